@@ -1,15 +1,14 @@
 import os
+import struct
 
 from qgis.core import (
     QgsFeature,
     QgsField,
     QgsFields,
     QgsGeometry,
-    QgsPoint,
     QgsProject,
     QgsVectorFileWriter,
     QgsVectorLayer,
-    QgsWkbTypes,
 )
 from qgis.PyQt.QtCore import QVariant
 from qgis.PyQt.QtWidgets import (
@@ -26,6 +25,25 @@ from qgis.PyQt.QtWidgets import (
 )
 from qgis.utils import iface
 
+# ISO WKB geometry type code of a PointZ
+WKB_POINT_Z = 1001
+
+# Schema shared by every point layer, built on first use
+_POINT_FIELDS = None
+
+
+def point_fields():
+    """Get the fields of a point layer, creating them once per session"""
+    global _POINT_FIELDS
+    if _POINT_FIELDS is None:
+        _POINT_FIELDS = QgsFields()
+        _POINT_FIELDS.append(QgsField("id", QVariant.Int))
+        _POINT_FIELDS.append(QgsField("x", QVariant.Double))
+        _POINT_FIELDS.append(QgsField("y", QVariant.Double))
+        _POINT_FIELDS.append(QgsField("z", QVariant.Double))
+        _POINT_FIELDS.append(QgsField("name", QVariant.String))
+    return _POINT_FIELDS
+
 
 class CreatePointLayerDialog(QDialog):
     def __init__(self):
@@ -43,7 +61,6 @@ class CreatePointLayerDialog(QDialog):
         name_row.addWidget(QLabel("Layer Name:"))
         self.name_input = QLineEdit()
         self.name_input.setPlaceholderText("Enter layer name")
-        self.name_input.setText("measurement_point")
         name_row.addWidget(self.name_input)
         name_layout.addLayout(name_row)
 
@@ -58,7 +75,6 @@ class CreatePointLayerDialog(QDialog):
         x_row.addWidget(QLabel("X Coordinate:"))
         self.x_spinbox = QDoubleSpinBox()
         self.x_spinbox.setRange(-999999999.0, 999999999.0)
-        self.x_spinbox.setValue(641056.0)
         self.x_spinbox.setDecimals(3)
         x_row.addWidget(self.x_spinbox)
         coords_layout.addLayout(x_row)
@@ -68,7 +84,6 @@ class CreatePointLayerDialog(QDialog):
         y_row.addWidget(QLabel("Y Coordinate:"))
         self.y_spinbox = QDoubleSpinBox()
         self.y_spinbox.setRange(-999999999.0, 999999999.0)
-        self.y_spinbox.setValue(162787.0)
         self.y_spinbox.setDecimals(3)
         y_row.addWidget(self.y_spinbox)
         coords_layout.addLayout(y_row)
@@ -78,7 +93,6 @@ class CreatePointLayerDialog(QDialog):
         z_row.addWidget(QLabel("Z Elevation:"))
         self.z_spinbox = QDoubleSpinBox()
         self.z_spinbox.setRange(-999999.0, 999999.0)
-        self.z_spinbox.setValue(88.86)
         self.z_spinbox.setDecimals(3)
         self.z_spinbox.setSuffix(" m")
         z_row.addWidget(self.z_spinbox)
@@ -97,8 +111,7 @@ class CreatePointLayerDialog(QDialog):
         file_row.addWidget(self.save_to_file_btn)
         output_layout.addLayout(file_row)
 
-        self.output_file_label = QLabel("Will create temporary layer if no file chosen")
-        self.output_file_label.setStyleSheet("color: gray; font-style: italic;")
+        self.output_file_label = QLabel()
         output_layout.addWidget(self.output_file_label)
 
         output_group.setLayout(output_layout)
@@ -122,27 +135,53 @@ class CreatePointLayerDialog(QDialog):
 
         self.setLayout(layout)
 
-        # Store output file path
-        self.output_file_path = None
+        # Fill in default values and output file path
+        self.reset()
 
-    def choose_output_file(self):
-        """Open file dialog to choose output shapefile location"""
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Point Layer As", "", "Shapefiles (*.shp);;All Files (*)"
-        )
+    def reset(self):
+        """Fill in the default values"""
+        self.name_input.setText("measurement_point")
+        self.x_spinbox.setValue(641056.0)
+        self.y_spinbox.setValue(162787.0)
+        self.z_spinbox.setValue(88.86)
+        self.set_output_file(None)
+
+    def set_output_file(self, file_path):
+        """Store the output file path and show it in the label"""
+        self.output_file_path = file_path
 
         if file_path:
-            if not file_path.endswith(".shp"):
-                file_path += ".shp"
-            self.output_file_path = file_path
             self.output_file_label.setText(f"Save to: {os.path.basename(file_path)}")
-            self.output_file_label.setStyleSheet("color: black;")
         else:
-            self.output_file_path = None
             self.output_file_label.setText(
                 "Will create temporary layer if no file chosen"
             )
-            self.output_file_label.setStyleSheet("color: gray; font-style: italic;")
+
+        # Grey italic placeholder look without re-parsing a style sheet
+        font = self.output_file_label.font()
+        font.setItalic(not file_path)
+        self.output_file_label.setFont(font)
+        self.output_file_label.setEnabled(bool(file_path))
+
+    def choose_output_file(self):
+        """Open file dialog to choose output GeoPackage or shapefile location"""
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Save Point Layer As",
+            "",
+            "GeoPackage (*.gpkg);;Shapefiles (*.shp);;All Files (*)",
+        )
+
+        if file_path:
+            if not file_path.endswith((".gpkg", ".shp")):
+                # Use the chosen format, GeoPackage for "All Files"
+                if selected_filter.startswith("Shapefiles"):
+                    file_path += ".shp"
+                else:
+                    file_path += ".gpkg"
+            self.set_output_file(file_path)
+        else:
+            self.set_output_file(None)
 
     def get_values(self):
         """Get the values from the dialog"""
@@ -157,81 +196,74 @@ class CreatePointLayerDialog(QDialog):
         return layer_name, x, y, z, self.output_file_path
 
 
-def create_point_layer(layer_name, x, y, z, output_file_path=None):
+def create_point_layer(layer_name, points, output_file_path=None):
     """
-    Create a point layer with a single point containing X, Y, Z coordinates
+    Create a point layer with one point per (x, y, z, name) tuple
 
     Args:
         layer_name: Name for the layer
-        x, y, z: Coordinates for the point
-        output_file_path: Optional path to save as shapefile
+        points: Iterable of (x, y, z, name) tuples
+        output_file_path: Optional path to save as GeoPackage or shapefile
 
     Returns:
         QgsVectorLayer: The created layer
     """
 
-    # Get current project CRS
-    project_crs = QgsProject.instance().crs()
+    # Build the point in a memory layer; a file output is exported from it below
+    layer_uri = f"PointZ?crs={QgsProject.instance().crs().authid()}"
+    layer = QgsVectorLayer(layer_uri, layer_name, "memory")
 
-    # Create fields for the layer
-    fields = QgsFields()
-    fields.append(QgsField("id", QVariant.Int))
-    fields.append(QgsField("x", QVariant.Double))
-    fields.append(QgsField("y", QVariant.Double))
-    fields.append(QgsField("z", QVariant.Double))
-    fields.append(QgsField("name", QVariant.String))
-
-    if output_file_path:
-        # Create shapefile
-        writer = QgsVectorFileWriter(
-            output_file_path,
-            "utf-8",
-            fields,
-            QgsWkbTypes.PointZ,  # Use PointZ for 3D points
-            project_crs,
-            "ESRI Shapefile",
-        )
+    if not layer.isValid():
+        raise Exception("Failed to create memory layer")
 
-        if writer.hasError() != QgsVectorFileWriter.NoError:
-            raise Exception(f"Error creating shapefile: {writer.errorMessage()}")
+    # Add the cached schema instead of parsing it from the layer URI
+    layer.dataProvider().addAttributes(point_fields().toList())
+    layer.updateFields()
 
-        # Create feature
+    # Create features, looking the schema up once for all of them
+    fields = layer.fields()
+    geometry = QgsGeometry()
+    features = []
+    for point_id, (x, y, z, name) in enumerate(points, start=1):
         feature = QgsFeature(fields)
-        point_geom = QgsGeometry.fromPoint(QgsPoint(x, y, z))
-        feature.setGeometry(point_geom)
-
-        # Set attributes
-        feature.setAttributes([1, x, y, z, layer_name])
-
-        # Write feature
-        writer.addFeature(feature)
-        del writer  # Close the file
+        # Build the PointZ straight from WKB; the feature keeps its own copy
+        geometry.fromWkb(struct.pack("<BIddd", 1, WKB_POINT_Z, x, y, z))
+        feature.setGeometry(geometry)
+        feature.setAttributes([point_id, x, y, z, name])
+        features.append(feature)
 
-        # Load the created shapefile
-        layer = QgsVectorLayer(output_file_path, layer_name, "ogr")
+    # Add all features straight to the provider in one batch
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
 
-    else:
-        # Create temporary memory layer
-        layer_uri = f"Point?crs={project_crs.authid()}&field=id:integer&field=x:double&field=y:double&field=z:double&field=name:string"
-        layer = QgsVectorLayer(layer_uri, layer_name, "memory")
-
-        if not layer.isValid():
-            raise Exception("Failed to create memory layer")
-
-        # Start editing
-        layer.startEditing()
-
-        # Create feature
-        feature = QgsFeature(layer.fields())
-        point_geom = QgsGeometry.fromPoint(QgsPoint(x, y, z))
-        feature.setGeometry(point_geom)
+    if output_file_path:
+        # The static writer wraps the whole export in a single OGR transaction
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = QgsVectorFileWriter.driverForExtension(
+            os.path.splitext(output_file_path)[1]
+        )
+        options.fileEncoding = "utf-8"
+        options.layerName = layer_name
+
+        (
+            error,
+            error_message,
+            new_file_path,
+            new_layer_name,
+        ) = QgsVectorFileWriter.writeAsVectorFormatV3(
+            layer,
+            output_file_path,
+            QgsProject.instance().transformContext(),
+            options,
+        )
 
-        # Set attributes
-        feature.setAttributes([1, x, y, z, layer_name])
+        if error != QgsVectorFileWriter.NoError:
+            raise Exception(f"Error creating output file: {error_message}")
 
-        # Add feature
-        layer.addFeature(feature)
-        layer.commitChanges()
+        # Load the created file
+        layer = QgsVectorLayer(
+            f"{new_file_path}|layername={new_layer_name}", layer_name, "ogr"
+        )
 
     if not layer.isValid():
         raise Exception("Created layer is not valid")
@@ -239,7 +271,7 @@ def create_point_layer(layer_name, x, y, z, output_file_path=None):
     # Add layer to project
     QgsProject.instance().addMapLayer(layer)
 
-    print(f"Created point layer '{layer_name}' with point at ({x}, {y}, {z})")
+    print(f"Created point layer '{layer_name}' with {len(features)} point(s)")
 
     if output_file_path:
         print(f"Layer saved to: {output_file_path}")
@@ -271,7 +303,7 @@ try:
         print(f"Coordinates: X={x}, Y={y}, Z={z}")
 
         # Create the point layer
-        layer = create_point_layer(layer_name, x, y, z, output_file)
+        layer = create_point_layer(layer_name, [(x, y, z, layer_name)], output_file)
 
         # Zoom to the created point
         iface.mapCanvas().setExtent(layer.extent())
@@ -1,161 +1,660 @@
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 
-from qgis import processing
+import numpy
+from osgeo import gdal, gdal_array, ogr
 from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeatureRequest,
     QgsFillSymbol,
+    QgsGeometry,
     QgsMapLayer,
+    QgsMessageLog,
+    QgsProcessingFeedback,
     QgsProject,
+    QgsRectangle,
+    QgsReferencedRectangle,
+    QgsSpatialIndex,
+    QgsTask,
+    QgsVectorFileWriter,
     QgsVectorLayer,
     QgsWkbTypes,
 )
 from qgis.PyQt.QtWidgets import (
     QButtonGroup,
+    QCheckBox,
     QDialog,
     QDoubleSpinBox,
     QGroupBox,
     QHBoxLayout,
     QLabel,
+    QMessageBox,
     QPushButton,
     QRadioButton,
     QVBoxLayout,
 )
 from qgis.utils import iface
 
+# Mask value for DEM cells without data, skipped when polygonizing
+MASK_NODATA = 255
 
-def create_water_level_polygon(
-    dem_layer,
-    point_layer,
-    level,
-    base_elevation,
-    extent,
-    output_dir,
-):
+# Number of DEM rows read at once when building the water masks
+STRIP_ROWS = 256
+
+# Intermediate water masks are written to disk so memory does not grow
+# with the number of levels; one tile row per strip, so every compressed
+# tile is written exactly once
+MASK_CREATION_OPTIONS = [
+    "TILED=YES",
+    "COMPRESS=DEFLATE",
+    f"BLOCKYSIZE={STRIP_ROWS}",
+]
+
+# Number of levels polygonized and filtered at the same time
+POLYGONIZE_WORKERS = 4
+
+# Transient polygon shapefiles need no .cpg, spatial index or type sniffing;
+# the .prj is kept as it carries the DEM CRS to the filtered output
+TEMP_SHAPEFILE_OPTIONS = ["SHPT=POLYGON", "ENCODING=", "SPATIAL_INDEX=NO"]
+
+# SQLite tuning for writing GeoPackage outputs
+GPKG_CONFIG_OPTIONS = {
+    "OGR_SQLITE_CACHE": "1024",
+    "OGR_SQLITE_SYNCHRONOUS": "OFF",
+    "SQLITE_USE_OGR_VFS": "YES",
+}
+
+
+def gdal_cancel_callback(feedback):
+    """Wrap a QgsProcessingFeedback into a GDAL callback that stops on cancel"""
+    if feedback is None:
+        return None
+
+    def callback(complete, message, data):
+        # GDAL stops the operation when the callback returns 0
+        return 0 if feedback.isCanceled() else 1
+
+    return callback
+
+
+@contextmanager
+def gdal_thread_config(options):
+    """Set GDAL configuration options for the current thread only"""
+    previous = {key: gdal.GetThreadLocalConfigOption(key) for key in options}
+    for key, value in options.items():
+        gdal.SetThreadLocalConfigOption(key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            gdal.SetThreadLocalConfigOption(key, value)
+
+
+def raster_window(dataset, extent):
     """
-    Create a polygon representing areas below a certain water level,
-    filtered to only include the polygon that overlaps with the point layer.
+    Get the pixel window of a north-up raster covered by an extent
     Args:
-        dem_layer: QgsRasterLayer - DEM raster layer
-        point_layer: QgsVectorLayer - Point layer for filtering
-        level: Water level above base elevation
-        base_elevation: Base elevation from point Z coordinate
-        extent: Processing extent
-        output_dir: Directory for output files
+        dataset: gdal.Dataset - Raster to read from
+        extent: QgsRectangle - Extent in the raster CRS
+    Returns:
+        tuple: (xoff, yoff, xsize, ysize) clipped to the raster
     """
-    # Create output folder for this water level
-    level_folder = os.path.join(output_dir, f"water_level_{level}m")
-    os.makedirs(level_folder, exist_ok=True)
-
-    # Get layer source paths
-    dem_path = dem_layer.source()
-    dem_name = os.path.splitext(os.path.basename(dem_path))[0]
-
-    # Step 1: Create raster mask for water level
-    raster_output = os.path.join(level_folder, f"{level}_level.tif")
-    print(dem_path)
-    print(f"DEM Name: {dem_name}")
-    print(
-        f"Creating raster mask for water level {level}m above base elevation {base_elevation}m from DEM: {dem_name}..."
+    x_origin, pixel_width, _, y_origin, _, pixel_height = dataset.GetGeoTransform()
+
+    col_min = max(math.floor((extent.xMinimum() - x_origin) / pixel_width), 0)
+    col_max = min(
+        math.ceil((extent.xMaximum() - x_origin) / pixel_width), dataset.RasterXSize
     )
-    processing.run(
-        "native:rastercalc",
-        {
-            "LAYERS": [dem_path],
-            "EXPRESSION": f'"{dem_name}.tif@1" < ({base_elevation}+{level})',
-            "EXTENT": extent,
-            "CELL_SIZE": None,
-            "CRS": dem_layer.crs().authid(),
-            "OUTPUT": raster_output,
-        },
+    # Rows grow downwards, so the top of the extent is the first row
+    row_min = max(math.floor((extent.yMaximum() - y_origin) / pixel_height), 0)
+    row_max = min(
+        math.ceil((extent.yMinimum() - y_origin) / pixel_height), dataset.RasterYSize
     )
 
-    # Step 2: Convert raster to polygon
-    temp_polygon_output = os.path.join(level_folder, f"{level}_level_polygon_temp.shp")
-    print("Converting raster to polygon...")
-    processing.run(
-        "gdal:polygonize",
-        {
-            "INPUT": raster_output,
-            "BAND": 1,
-            "FIELD": "DN",
-            "EIGHT_CONNECTEDNESS": True,
-            "EXTRA": "",
-            "OUTPUT": temp_polygon_output,
-        },
-    )
+    if col_max <= col_min or row_max <= row_min:
+        raise ValueError("Processing extent does not overlap the DEM")
 
-    # Step 3: Filter polygons to keep only the one that overlaps with the point
-    filtered_polygon_output = os.path.join(level_folder, f"{level}_level_polygon.shp")
+    return col_min, row_min, col_max - col_min, row_max - row_min
 
-    print("Filtering polygons to keep only the one overlapping with point...")
 
-    # Load temporary polygon layer
-    temp_polygon_layer = QgsVectorLayer(temp_polygon_output, "temp_polygons", "ogr")
+def parse_extent(extent):
+    """
+    Parse an extent string into a referenced rectangle
+    Args:
+        extent: "xmin,xmax,ymin,ymax [EPSG:code]" string, CRS is optional
+    Returns:
+        QgsReferencedRectangle: The extent, with an invalid CRS if none is named
+    """
+    coordinates, _, extent_crs = extent.partition("[")
+    try:
+        xmin, xmax, ymin, ymax = (float(value) for value in coordinates.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid extent: {extent}")
 
-    # Add layers to project temporarily
-    QgsProject.instance().addMapLayer(temp_polygon_layer, False)
+    crs = QgsCoordinateReferenceSystem()
+    extent_crs = extent_crs.strip(" ]")
+    if extent_crs:
+        crs = QgsCoordinateReferenceSystem(extent_crs)
+        if not crs.isValid():
+            raise ValueError(f"Invalid extent CRS: {extent_crs}")
 
-    # Use the layer objects for selectbylocation
-    processing.run(
-        "native:selectbylocation",
-        {
-            "INPUT": temp_polygon_layer,
-            "PREDICATE": [0],  # intersects
-            "INTERSECT": point_layer,
-            "METHOD": 0,  # creating new selection
-        },
-    )
+    return QgsReferencedRectangle(QgsRectangle(xmin, ymin, xmax, ymax), crs)
 
-    # Extract selected features to new layer
-    processing.run(
-        "native:saveselectedfeatures",
-        {
-            "INPUT": temp_polygon_layer,
-            "OUTPUT": filtered_polygon_output,
-        },
+
+def extent_in_crs(extent, crs):
+    """
+    Get a referenced extent as a rectangle in the given CRS
+    Args:
+        extent: QgsReferencedRectangle - Extent, taken to be in crs if it has no CRS
+        crs: QgsCoordinateReferenceSystem - CRS of the returned rectangle
+    Returns:
+        QgsRectangle: The extent, transformed if it is in another CRS
+    """
+    if not extent.crs().isValid() or extent.crs() == crs:
+        return QgsRectangle(extent)
+
+    transform = QgsCoordinateTransform(extent.crs(), crs, QgsProject.instance())
+    return transform.transformBoundingBox(extent)
+
+
+def native_threshold(water_elevation, dtype):
+    """
+    Convert a water elevation to the DEM data type so comparing against it
+    keeps the cells in their native type
+    Args:
+        water_elevation: Absolute water elevation
+        dtype: numpy.dtype - Data type of the DEM cells
+    Returns:
+        The threshold as a scalar of the DEM data type when it is exact,
+        the original elevation otherwise
+    """
+    if numpy.issubdtype(dtype, numpy.integer):
+        # For integer cells, value < elevation is the same as value < ceil(elevation)
+        threshold = math.ceil(water_elevation)
+        info = numpy.iinfo(dtype)
+        if info.min <= threshold <= info.max:
+            return dtype.type(threshold)
+        return water_elevation
+    return dtype.type(water_elevation)
+
+
+def create_water_masks(
+    dem_path,
+    dem_crs,
+    extent,
+    water_elevations,
+    mask_paths,
+    feedback=None,
+):
+    """
+    Create one mask GeoTIFF per water elevation, streaming the DEM in strips
+    aligned to the mask tiles. Neither the DEM nor the masks are held in memory at
+    once, so memory stays bounded by the strip size and GDAL's block cache
+    however many levels there are.
+    Args:
+        dem_path: Path of the DEM raster
+        dem_crs: WKT of the DEM layer's CRS, which may differ from the file's
+        extent: QgsRectangle - Processing extent in the DEM CRS
+        water_elevations: Absolute water elevations to compare the DEM with
+        mask_paths: Path - Output mask file for each water elevation
+        feedback: Optional QgsProcessingFeedback used to cancel
+    Masks have 1 for cells below the water elevation, 0 above and
+    MASK_NODATA for cells without data.
+    """
+    dem = gdal.Open(dem_path)
+    if dem is None:
+        raise Exception(f"Error opening DEM: {gdal.GetLastErrorMsg()}")
+    dem_band = dem.GetRasterBand(1)
+    nodata = dem_band.GetNoDataValue()
+
+    # Compare in the DEM's own data type rather than promoting cells to float64
+    dtype = numpy.dtype(gdal_array.GDALTypeCodeToNumericTypeCode(dem_band.DataType))
+    thresholds = [
+        native_threshold(water_elevation, dtype) for water_elevation in water_elevations
+    ]
+
+    # Masks cover only the part of the DEM inside the processing extent
+    xoff, yoff, xsize, ysize = raster_window(dem, extent)
+    x_origin, pixel_width, _, y_origin, _, pixel_height = dem.GetGeoTransform()
+    geotransform = (
+        x_origin + xoff * pixel_width,
+        pixel_width,
+        0,
+        y_origin + yoff * pixel_height,
+        0,
+        pixel_height,
     )
 
-    # Remove temporary layer from project
-    QgsProject.instance().removeMapLayer(temp_polygon_layer.id())
+    masks = []
+    try:
+        for mask_path in mask_paths:
+            mask = gdal.GetDriverByName("GTiff").Create(
+                str(mask_path), xsize, ysize, 1, gdal.GDT_Byte, MASK_CREATION_OPTIONS
+            )
+            if mask is None:
+                raise Exception(
+                    f"Error creating raster mask: {gdal.GetLastErrorMsg()}"
+                )
+            mask.SetGeoTransform(geotransform)
+            mask.SetProjection(dem_crs)
+            mask.GetRasterBand(1).SetNoDataValue(MASK_NODATA)
+            masks.append(mask)
+        mask_bands = [mask.GetRasterBand(1) for mask in masks]
+
+        # Strips follow the mask tile rows, which start at the top of the
+        # window; DEM blocks they cut through are read from the block cache
+        row = 0
+        while row < ysize:
+            if feedback is not None and feedback.isCanceled():
+                break
+
+            rows = min(STRIP_ROWS, ysize - row)
+            elevations = dem_band.ReadAsArray(xoff, yoff + row, xsize, rows)
+
+            invalid = None
+            if nodata is not None:
+                if math.isnan(nodata):
+                    invalid = numpy.isnan(elevations)
+                else:
+                    invalid = elevations == nodata
+
+            # One vectorised comparison per level, written straight as bytes
+            water = numpy.empty(elevations.shape, numpy.uint8)
+            for band, threshold in zip(mask_bands, thresholds):
+                numpy.less(elevations, threshold, out=water.view(bool))
+                if invalid is not None:
+                    water[invalid] = MASK_NODATA
+                band.WriteArray(water, 0, row)
+
+            row += rows
+    finally:
+        # Close the masks so they are flushed to disk, and can be deleted
+        # even if a traceback keeps this frame alive
+        band = None
+        mask_bands = None
+        mask = None
+        masks = None
+
+
+def polygonize_water_level(
+    mask_path,
+    point_geometry,
+    level,
+    level_folder,
+    transform_context,
+    feedback=None,
+):
+    """
+    Create a polygon representing areas below a certain water level,
+    filtered to only include the polygon that overlaps with the points.
+    Intermediate polygons stay in GDAL's /vsimem/ and only the filtered
+    polygon is written to disk. Only works on its own mask, file paths and
+    plain geometries, so several levels can run in parallel from a
+    background task.
+    Args:
+        mask_path: Path - Water mask written by create_water_masks
+        point_geometry: QgsGeometry - Points for filtering, in the DEM CRS
+        level: Water level above base elevation
+        level_folder: Path - Existing directory for this water level's files
+        transform_context: QgsCoordinateTransformContext used for writing
+        feedback: Optional QgsProcessingFeedback used to cancel
+    Returns:
+        Path: Path of the filtered polygon GeoPackage, or None if cancelled
+    """
+    mask = gdal.Open(str(mask_path))
+    if mask is None:
+        raise Exception(f"Error opening raster mask: {gdal.GetLastErrorMsg()}")
+
+    # Step 2: Convert raster to polygon in memory
+    temp_polygon_output = f"/vsimem/poly_{level}.shp"
+    QgsMessageLog.logMessage("Converting raster to polygon...", "Water Level")
+
+    polygons = None
+    temp_polygon_layer = None
+    try:
+        band = mask.GetRasterBand(1)
+        polygons = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(
+            temp_polygon_output
+        )
+        polygons_layer = polygons.CreateLayer(
+            "polygons",
+            mask.GetSpatialRef(),
+            ogr.wkbPolygon,
+            TEMP_SHAPEFILE_OPTIONS,
+        )
+        polygons_layer.CreateField(ogr.FieldDefn("DN", ogr.OFTInteger))
+        result = gdal.Polygonize(
+            band,
+            band.GetMaskBand(),
+            polygons_layer,
+            0,  # DN field index
+            ["8CONNECTED=8"],
+            callback=gdal_cancel_callback(feedback),
+        )
 
-    # Step 4: Load the filtered polygon layer into QGIS project
-    polygon_layer = QgsProject.instance().addMapLayer(
-        QgsVectorLayer(
-            filtered_polygon_output,
-            f"Water Level {level}m (Base: {base_elevation:.1f}m)",
-            "ogr",
+        # Close the polygons so they are flushed to /vsimem/
+        polygons_layer = None
+        polygons = None
+
+        # Cancelling makes GDAL fail too, so check for it first
+        if feedback is not None and feedback.isCanceled():
+            return None
+        if result != 0:
+            raise Exception(
+                f"Error polygonizing water level {level}m: {gdal.GetLastErrorMsg()}"
+            )
+
+        # Step 3: Filter polygons to keep only the one that overlaps with the point
+        filtered_polygon_output = level_folder / f"{level}_level_polygon.gpkg"
+        QgsMessageLog.logMessage(
+            "Filtering polygons to keep only the one overlapping with point...",
+            "Water Level",
+        )
+
+        temp_polygon_layer = QgsVectorLayer(
+            temp_polygon_output, "temp_polygons", "ogr"
+        )
+
+        # Index the polygons so only the ones around the points are tested
+        index = QgsSpatialIndex(
+            temp_polygon_layer.getFeatures(QgsFeatureRequest().setNoAttributes()),
+            feedback,
+            QgsSpatialIndex.FlagStoreFeatureGeometries,
+        )
+        candidate_ids = set()
+        for point in point_geometry.vertices():
+            candidate_ids.update(
+                index.intersects(
+                    QgsRectangle(point.x(), point.y(), point.x(), point.y())
+                )
+            )
+        temp_polygon_layer.selectByIds(
+            [
+                polygon_id
+                for polygon_id in candidate_ids
+                if index.geometry(polygon_id).intersects(point_geometry)
+            ]
         )
-    )
 
-    # Set the layer style to transparent blue
+        # A cancelled index is incomplete, never let it replace an earlier output
+        if feedback is not None and feedback.isCanceled():
+            return None
+
+        # Write only the selected polygon to disk
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.onlySelectedFeatures = True
+
+        with gdal_thread_config(GPKG_CONFIG_OPTIONS):
+            error, error_message, _, _ = QgsVectorFileWriter.writeAsVectorFormatV3(
+                temp_polygon_layer,
+                str(filtered_polygon_output),
+                transform_context,
+                options,
+            )
+        if error != QgsVectorFileWriter.NoError:
+            raise Exception(f"Error writing water level polygon: {error_message}")
+    finally:
+        # Release the temporary layer before removing its files, and close
+        # the mask so it can be deleted even if a traceback keeps this frame
+        temp_polygon_layer = None
+        polygons_layer = None
+        polygons = None
+        band = None
+        mask = None
+
+        # Clean up temporary files, listing the directory once for all sidecars
+        temp_dir, temp_name = os.path.split(temp_polygon_output)
+        temp_stem = os.path.splitext(temp_name)[0]
+        for name in gdal.ReadDir(temp_dir) or []:
+            if os.path.splitext(name)[0] == temp_stem:
+                gdal.Unlink(f"{temp_dir}/{name}")
+
+    return filtered_polygon_output
 
-    # Create a blue transparent fill symbol
-    symbol = QgsFillSymbol.createSimple(
+
+def fill_symbol(color, outline_color, outline_width):
+    """
+    Create a simple fill symbol, shared by a batch of layers, so only ever
+    apply clones of it to layers.
+    Args:
+        color: Fill color as an "r,g,b,a" string
+        outline_color: Outline color as an "r,g,b,a" string
+        outline_width: Outline width as a string
+    Returns:
+        QgsFillSymbol: The symbol
+    """
+    return QgsFillSymbol.createSimple(
         {
-            "color": "0,100,255,100",  # RGBA: blue with transparency (alpha=100 out of 255)
-            "outline_color": "0,50,200,200",  # Darker blue outline
-            "outline_width": "0.5",
+            "color": color,
+            "outline_color": outline_color,
+            "outline_width": outline_width,
         }
     )
 
-    # Apply the symbol to the layer
-    polygon_layer.renderer().setSymbol(symbol)
-    polygon_layer.triggerRepaint()
 
-    # Clean up temporary file
-    if os.path.exists(temp_polygon_output):
-        os.remove(temp_polygon_output)
-        # Remove associated files
-        for ext in [".shx", ".dbf", ".prj", ".cpg"]:
-            temp_file = temp_polygon_output.replace(".shp", ext)
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+def load_water_level_layer(filtered_polygon_output, level, base_elevation, symbol):
+    """
+    Load the filtered water level polygon and style it, without adding it to
+    the project so a batch of layers can be added at once.
+    Args:
+        filtered_polygon_output: Path - Filtered polygon GeoPackage
+        level: Water level above base elevation
+        base_elevation: Base elevation from point Z coordinate
+        symbol: QgsFillSymbol - Symbol shared by the batch, cloned for the layer
+    Returns:
+        QgsVectorLayer: The styled polygon layer
+    """
+    # Step 4: Load the filtered polygon layer
+    polygon_layer = QgsVectorLayer(
+        str(filtered_polygon_output),
+        f"Water Level {level}m (Base: {base_elevation:.1f}m)",
+        "ogr",
+    )
+
+    # Apply the symbol to the layer, which takes ownership of its own copy
+    polygon_layer.renderer().setSymbol(symbol.clone())
 
-    print(f"Filtered water level polygon created in folder: {level_folder}")
+    print(
+        f"Filtered water level polygon created in folder: {filtered_polygon_output.parent}"
+    )
     print(
         f"Base elevation: {base_elevation:.2f}m, Water level: {level}m, Total elevation: {base_elevation + level:.2f}m"
     )
-    return filtered_polygon_output
+    return polygon_layer
+
+
+class WaterLevelTask(QgsTask):
+    """Background task creating water level polygons without freezing QGIS"""
+
+    def __init__(
+        self,
+        dem_layer,
+        point_layer,
+        levels,
+        base_elevation,
+        extent,
+        output_dir,
+    ):
+        super().__init__("Water level polygons", QgsTask.CanCancel)
+        # Only plain values are read from the layers, which are not thread safe
+        self.dem_path = dem_layer.source()
+        self.dem_crs = dem_layer.crs().toWkt()
+        self.levels = sorted(set(levels))
+        self.base_elevation = base_elevation
+        self.extent = extent_in_crs(extent, dem_layer.crs())
+        self.output_dir = Path(output_dir)
+        self.transform_context = QgsProject.instance().transformContext()
+        self.feedback = QgsProcessingFeedback()
+        self.polygon_paths = {}
+        self.exception = None
+
+        # Snapshot the points in the DEM CRS for filtering off the main thread
+        transform = QgsCoordinateTransform(
+            point_layer.crs(), dem_layer.crs(), QgsProject.instance()
+        )
+        point_geometries = []
+        for feature in point_layer.getFeatures(QgsFeatureRequest().setNoAttributes()):
+            geometry = feature.geometry()
+            geometry.transform(transform)
+            point_geometries.append(geometry)
+        self.point_geometry = QgsGeometry.collectGeometry(point_geometries)
+
+    def run(self):
+        """Create and filter the water level polygons in the background"""
+        # Create the output folders for the whole batch up front
+        level_folders = [
+            self.output_dir / f"water_level_{level}m" for level in self.levels
+        ]
+        mask_paths = [
+            level_folder / f"{level}_level.tif"
+            for level, level_folder in zip(self.levels, level_folders)
+        ]
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            for level_folder in level_folders:
+                level_folder.mkdir(exist_ok=True)
+
+            # Stream the DEM once, building the masks of all levels together
+            QgsMessageLog.logMessage(
+                f"Creating raster masks for water levels above base elevation {self.base_elevation}m...",
+                "Water Level",
+            )
+            create_water_masks(
+                self.dem_path,
+                self.dem_crs,
+                self.extent,
+                [self.base_elevation + level for level in self.levels],
+                mask_paths,
+                self.feedback,
+            )
+            if self.isCanceled():
+                return False
+
+            # GDAL and NumPy release the GIL, so levels run in parallel; the
+            # worker count also caps how many polygon sets are in memory
+            with ThreadPoolExecutor(max_workers=POLYGONIZE_WORKERS) as executor:
+                futures = {}
+                for level, mask_path, level_folder in zip(
+                    self.levels, mask_paths, level_folders
+                ):
+                    future = executor.submit(
+                        polygonize_water_level,
+                        mask_path,
+                        self.point_geometry,
+                        level,
+                        level_folder,
+                        self.transform_context,
+                        self.feedback,
+                    )
+                    futures[future] = level
+
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        self.polygon_paths[futures[future]] = future.result()
+                    except Exception:
+                        # Stop the other levels before the executor waits for them
+                        self.feedback.cancel()
+                        raise
+                    self.setProgress(done * 100 / len(futures))
+        except Exception as e:
+            # Drop the traceback, its frames would keep GDAL datasets open
+            self.exception = e.with_traceback(None)
+            return False
+        finally:
+            # The masks are only intermediates
+            for mask_path in mask_paths:
+                if mask_path.exists():
+                    gdal.GetDriverByName("GTiff").Delete(str(mask_path))
+        # Cancelled levels have no polygon to load
+        if self.isCanceled() or None in self.polygon_paths.values():
+            return False
+        return True
+
+    def cancel(self):
+        # Mark the task cancelled before the workers can see the feedback
+        super().cancel()
+        self.feedback.cancel()
+
+    def finished(self, result):
+        """Add the polygon layers to the project on the main thread"""
+        if not result:
+            if self.exception is None:
+                print("Water level polygon creation cancelled")
+                return
+            QMessageBox.critical(
+                iface.mainWindow(),
+                "Unexpected Error",
+                f"An error occurred: {str(self.exception)}",
+            )
+            print(f"Unexpected error: {self.exception}")
+            return
+
+        # Blue transparent fill symbol, identical for every level
+        symbol = fill_symbol(
+            "0,100,255,100",  # RGBA: blue with transparency (alpha=100 out of 255)
+            "0,50,200,200",  # Darker blue outline
+            "0.5",
+        )
+
+        polygon_layers = []
+        for level in self.levels:
+            polygon_layers.append(
+                load_water_level_layer(
+                    self.polygon_paths[level], level, self.base_elevation, symbol
+                )
+            )
+            print(
+                f"Created polygon for water level: {level}m above base elevation {self.base_elevation:.2f}m"
+            )
+
+        # One project update and one canvas render for the whole batch
+        canvas = iface.mapCanvas()
+        canvas.setRenderFlag(False)
+        try:
+            QgsProject.instance().addMapLayers(polygon_layers)
+        finally:
+            canvas.setRenderFlag(True)
+
+
+def create_water_level_polygons(
+    dem_layer,
+    point_layer,
+    levels,
+    base_elevation,
+    extent,
+    output_dir,
+):
+    """
+    Create polygons representing areas below each water level,
+    filtered to only include the polygon that overlaps with the point layer.
+    All levels are processed in one background task sharing a single DEM
+    read; the polygon layers are added to the project when it finishes.
+    Args:
+        dem_layer: QgsRasterLayer - DEM raster layer
+        point_layer: QgsVectorLayer - Point layer for filtering
+        levels: Water levels above base elevation
+        base_elevation: Base elevation from point Z coordinate
+        extent: QgsReferencedRectangle - Processing extent
+        output_dir: Directory for output files
+    Returns:
+        WaterLevelTask: The submitted task, keep a reference while it runs
+    """
+    task = WaterLevelTask(
+        dem_layer,
+        point_layer,
+        levels,
+        base_elevation,
+        extent,
+        output_dir,
+    )
+    QgsApplication.taskManager().addTask(task)
+    return task
 
 
 # Custom dialog widget with both inputs
@@ -165,7 +664,7 @@ class WaterLevelDialog(QDialog):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Water Level Polygon Generator")
-        self.setFixedSize(500, 350)
+        self.setFixedSize(500, 450)
 
         # Main layout
         layout = QVBoxLayout()
@@ -180,7 +679,6 @@ class WaterLevelDialog(QDialog):
         dem_layout = QHBoxLayout()
         dem_layout.addWidget(QLabel("DEM Layer:"))
         self.dem_combo = QComboBox()
-        self.populate_raster_layers()
         dem_layout.addWidget(self.dem_combo)
         layers_layout.addLayout(dem_layout)
 
@@ -188,23 +686,57 @@ class WaterLevelDialog(QDialog):
         point_layout = QHBoxLayout()
         point_layout.addWidget(QLabel("Point Layer (with Z):"))
         self.point_combo = QComboBox()
-        self.populate_point_layers()
         point_layout.addWidget(self.point_combo)
         layers_layout.addLayout(point_layout)
 
+        self.populate_layers()
+
         layers_group.setLayout(layers_layout)
 
         # Water level input
-        level_group = QGroupBox("Water Level")
-        level_layout = QHBoxLayout()
-        level_layout.addWidget(QLabel("Level (meters above base):"))
+        level_group = QGroupBox("Water Levels")
+        level_layout = QVBoxLayout()
 
+        level_row = QHBoxLayout()
+        level_row.addWidget(QLabel("Level (meters above base):"))
         self.level_spinbox = QDoubleSpinBox()
         self.level_spinbox.setRange(0.0, 50.0)
         self.level_spinbox.setValue(10.0)
         self.level_spinbox.setDecimals(1)
         self.level_spinbox.setSuffix(" m")
-        level_layout.addWidget(self.level_spinbox)
+        level_row.addWidget(self.level_spinbox)
+        level_layout.addLayout(level_row)
+
+        # Optional series of levels up to a maximum
+        self.series_checkbox = QCheckBox("Generate series of levels")
+        level_layout.addWidget(self.series_checkbox)
+
+        max_level_row = QHBoxLayout()
+        max_level_row.addWidget(QLabel("Up to level:"))
+        self.max_level_spinbox = QDoubleSpinBox()
+        self.max_level_spinbox.setRange(0.0, 50.0)
+        self.max_level_spinbox.setValue(10.0)
+        self.max_level_spinbox.setDecimals(1)
+        self.max_level_spinbox.setSuffix(" m")
+        self.max_level_spinbox.setEnabled(False)  # Initially disabled
+        max_level_row.addWidget(self.max_level_spinbox)
+        level_layout.addLayout(max_level_row)
+
+        step_row = QHBoxLayout()
+        step_row.addWidget(QLabel("Step:"))
+        self.step_spinbox = QDoubleSpinBox()
+        self.step_spinbox.setRange(0.1, 50.0)
+        self.step_spinbox.setValue(1.0)
+        self.step_spinbox.setDecimals(1)
+        self.step_spinbox.setSuffix(" m")
+        self.step_spinbox.setEnabled(False)  # Initially disabled
+        step_row.addWidget(self.step_spinbox)
+        level_layout.addLayout(step_row)
+
+        # Connect checkbox to enable/disable the series inputs
+        self.series_checkbox.toggled.connect(self.max_level_spinbox.setEnabled)
+        self.series_checkbox.toggled.connect(self.step_spinbox.setEnabled)
+
         level_group.setLayout(level_layout)
 
         # Extent selection
@@ -255,20 +787,20 @@ class WaterLevelDialog(QDialog):
 
         self.setLayout(layout)
 
-    def populate_raster_layers(self):
-        """Populate combo box with available raster layers"""
+    def populate_layers(self):
+        """Populate combo boxes with available raster and point vector layers"""
         self.dem_combo.clear()
-        for layer in QgsProject.instance().mapLayers().values():
-            if layer.type() == QgsMapLayer.RasterLayer:
-                self.dem_combo.addItem(layer.name(), layer)
-
-    def populate_point_layers(self):
-        """Populate combo box with available point vector layers"""
         self.point_combo.clear()
+
+        # Partition the project layers in a single pass
+        point_geometry = QgsWkbTypes.PointGeometry
         for layer in QgsProject.instance().mapLayers().values():
-            if (
-                layer.type() == QgsMapLayer.VectorLayer
-                and layer.geometryType() == QgsWkbTypes.PointGeometry
+            layer_type = layer.type()
+            if layer_type == QgsMapLayer.RasterLayer:
+                self.dem_combo.addItem(layer.name(), layer)
+            elif (
+                layer_type == QgsMapLayer.VectorLayer
+                and layer.geometryType() == point_geometry
             ):
                 self.point_combo.addItem(layer.name(), layer)
 
@@ -277,16 +809,25 @@ class WaterLevelDialog(QDialog):
         if not point_layer or point_layer.featureCount() == 0:
             raise ValueError("Point layer is empty or invalid")
 
-        # Get the first feature
-        first_feature = next(point_layer.getFeatures())
+        # Candidate Z attributes in order of preference, matched ignoring case
+        fields = point_layer.fields()
+        field_names = {field.name().lower(): field.name() for field in fields}
+        z_fields = [
+            field_names[name]
+            for name in ["z", "elevation", "elev", "height"]
+            if name in field_names
+        ]
+
+        # Get the first feature, loading only the candidate Z attributes
+        request = (
+            QgsFeatureRequest().setLimit(1).setSubsetOfAttributes(z_fields, fields)
+        )
+        first_feature = next(point_layer.getFeatures(request))
         geometry = first_feature.geometry()
 
         if geometry.isEmpty():
             raise ValueError("Point geometry is empty")
 
-        # Get the point and extract Z coordinate
-        point = geometry.asPoint()
-
         # Check if geometry has Z dimension
         if geometry.wkbType() in [
             QgsWkbTypes.Point25D,
@@ -300,11 +841,10 @@ class WaterLevelDialog(QDialog):
             return vertex.z()
         else:
             # Try to get Z from attributes if geometry doesn't have Z
-            for field_name in ["z", "Z", "elevation", "elev", "height"]:
-                if field_name in [field.name() for field in first_feature.fields()]:
-                    z_value = first_feature[field_name]
-                    if z_value is not None:
-                        return float(z_value)
+            for field_name in z_fields:
+                z_value = first_feature[field_name]
+                if z_value is not None:
+                    return float(z_value)
 
             raise ValueError(
                 "Point layer has no Z coordinate in geometry or attributes"
@@ -324,23 +864,34 @@ class WaterLevelDialog(QDialog):
         # Get base elevation from point layer
         base_elevation = self.get_base_elevation_from_point(point_layer)
 
-        # Get water level
+        # Get water levels
         level = self.level_spinbox.value()
+        if self.series_checkbox.isChecked():
+            max_level = self.max_level_spinbox.value()
+            step = self.step_spinbox.value()
+            if max_level < level:
+                raise ValueError("Maximum level cannot be below the first level")
+            # Small tolerance so the maximum is kept despite float rounding
+            count = math.floor((max_level - level) / step + 1e-9) + 1
+            levels = [round(level + i * step, 1) for i in range(count)]
+        else:
+            levels = [level]
 
         # Get extent
         if self.canvas_radio.isChecked():
-            # Get current canvas extent
+            # Get current canvas extent together with its CRS
             canvas = iface.mapCanvas()
-            extent = canvas.extent()
-            crs = canvas.mapSettings().destinationCrs().authid()
-            extent_string = f"{extent.xMinimum()},{extent.xMaximum()},{extent.yMinimum()},{extent.yMaximum()} [{crs}]"
+            extent = QgsReferencedRectangle(
+                canvas.extent(), canvas.mapSettings().destinationCrs()
+            )
         else:
             # Use custom extent from text input
             extent_string = self.extent_input.text().strip()
             if not extent_string:
                 raise ValueError("Custom extent cannot be empty")
+            extent = parse_extent(extent_string)
 
-        return dem_layer, point_layer, base_elevation, level, extent_string
+        return dem_layer, point_layer, base_elevation, levels, extent
 
 
 def get_user_inputs():
@@ -355,7 +906,7 @@ def get_user_inputs():
 
 try:
     # Get all inputs from custom dialog
-    dem_layer, point_layer, base_elevation, level, extent = get_user_inputs()
+    dem_layer, point_layer, base_elevation, levels, extent = get_user_inputs()
 
     if dem_layer is None:
         print("Operation cancelled by user")
@@ -364,33 +915,26 @@ try:
     print(f"DEM Layer: {dem_layer.name()}")
     print(f"Point Layer: {point_layer.name()}")
     print(f"Base elevation from point: {base_elevation:.2f}m")
-    print(f"Water level: {level}m")
-    print(f"Total water elevation: {base_elevation + level:.2f}m")
-    print(f"Using extent: {extent}")
+    print(f"Water levels: {', '.join(f'{level}m' for level in levels)}")
+    print(f"Using extent: {extent.toString()} [{extent.crs().authid()}]")
 
     project_home = Path(QgsProject.instance().homePath())
 
-    # Create polygon with user inputs
-    polygon_path = create_water_level_polygon(
+    # Create polygons with user inputs in the background
+    water_level_task = create_water_level_polygons(
         dem_layer,
         point_layer,
-        level,
+        levels,
         base_elevation,
         extent,
         project_home / "output",
     )
-    print(
-        f"Created polygon for water level: {level}m above base elevation {base_elevation:.2f}m"
-    )
+    print(f"Started water level polygon task for {len(levels)} level(s)")
 
 except ValueError as e:
-    from qgis.PyQt.QtWidgets import QMessageBox
-
     QMessageBox.warning(iface.mainWindow(), "Input Error", str(e))
     print(f"Error: {e}")
 except Exception as e:
-    from qgis.PyQt.QtWidgets import QMessageBox
-
     QMessageBox.critical(
         iface.mainWindow(), "Unexpected Error", f"An error occurred: {str(e)}"
     )
@@ -398,4 +942,4 @@ except Exception as e:
 
 # Option 2: Use console input (uncomment to use)
 # level = get_console_input()
-# polygon_path = create_water_level_polygon(level)
+# water_level_task = create_water_level_polygons([level])